@@ -4,16 +4,36 @@ Letterboxd Activity Parser for TRMNL Display
 Extracts movie reviews and ratings from Letterboxd RSS feed
 """
 
+import io
 import re
 import json
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import List, Dict
+from typing import IO, List, Dict, Union
 from html import unescape
 
+# Precompiled patterns used on every feed item
+_RE_SLUG = re.compile(r'/film/([^/]+)/')
+# Paragraph ends and line breaks, which become newlines
+_RE_BREAK = re.compile(r'</p>|<br\s*/?>')
+_RE_TAG = re.compile(r'<[^>]+>')  # Also covers <img> and <p>
+
+# Star displays for every half-star rating from 0 to 5, indexed by rating * 2
+_RATING_DISPLAY = tuple('★' * (i // 2) + ('½' if i % 2 else '') for i in range(11))
+
+# Qualified tag names in the letterboxd namespace
+LETTERBOXD_NS = '{https://letterboxd.com}'
+FILM_TITLE_TAG = LETTERBOXD_NS + 'filmTitle'
+FILM_YEAR_TAG = LETTERBOXD_NS + 'filmYear'
+MEMBER_RATING_TAG = LETTERBOXD_NS + 'memberRating'
+WATCHED_DATE_TAG = LETTERBOXD_NS + 'watchedDate'
+
 
 def parse_rating_display(rating: float) -> str:
     """Convert numeric rating to star display (e.g., 4.5 -> ★★★★½)"""
+    if 0 <= rating <= 5:
+        return _RATING_DISPLAY[int(rating * 2)]
+
     full_stars = int(rating)
     half_star = '½' if (rating % 1) >= 0.5 else ''
     return '★' * full_stars + half_star
@@ -24,18 +44,15 @@ def extract_review_from_description(description: str) -> str:
     if not description:
         return ''
 
-    # Remove HTML tags
-    text = re.sub(r'<img[^>]*>', '', description)  # Remove images
-    text = re.sub(r'<p>', '', text)
-    text = re.sub(r'</p>', '\n', text)
-    text = re.sub(r'<br\s*/?>', '\n', text)
-    text = re.sub(r'<[^>]+>', '', text)  # Remove any other tags
+    # Convert paragraph/line breaks to newlines, then remove all other tags
+    text = _RE_TAG.sub('', _RE_BREAK.sub('\n', description))
 
     # Unescape HTML entities
     text = unescape(text)
 
     # Clean up whitespace
-    text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+    lines = (line.strip() for line in text.split('\n'))
+    text = '\n'.join(line for line in lines if line)
 
     # Filter out "Watched on..." lines that have no review
     if text.startswith('Watched on '):
@@ -44,28 +61,29 @@ def extract_review_from_description(description: str) -> str:
     return text.strip()
 
 
-def parse_letterboxd_rss(xml_content: str) -> List[Dict]:
-    """Parse Letterboxd RSS feed and return list of activities"""
-
-    # Parse XML
-    root = ET.fromstring(xml_content)
+def parse_letterboxd_rss(xml_content: Union[str, IO]) -> List[Dict]:
+    """Parse Letterboxd RSS feed (XML string or open file) and return list of activities"""
 
-    # Define namespaces
-    namespaces = {
-        'letterboxd': 'https://letterboxd.com',
-        'tmdb': 'https://themoviedb.org',
-        'dc': 'http://purl.org/dc/elements/1.1/'
-    }
+    if isinstance(xml_content, str):
+        xml_content = io.StringIO(xml_content)
 
     activities = []
+    channel = None
+
+    # Stream items from the RSS feed, dropping each one from the tree once processed
+    for event, item in ET.iterparse(xml_content, events=('start', 'end')):
+        if event == 'start':
+            if item.tag == 'channel':
+                channel = item
+            continue
+        if item.tag != 'item':
+            continue
 
-    # Find all items in the RSS feed
-    for item in root.findall('.//item'):
         activity = {}
 
         # Extract film title and year from letterboxd namespace
-        film_title = item.find('letterboxd:filmTitle', namespaces)
-        film_year = item.find('letterboxd:filmYear', namespaces)
+        film_title = item.find(FILM_TITLE_TAG)
+        film_year = item.find(FILM_YEAR_TAG)
 
         if film_title is not None:
             activity['title'] = film_title.text
@@ -77,12 +95,12 @@ def parse_letterboxd_rss(xml_content: str) -> List[Dict]:
         if link is not None and link.text:
             activity['url'] = link.text
             # Extract slug from URL (e.g., "hamnet" from "/nicolep/film/hamnet/")
-            slug_match = re.search(r'/film/([^/]+)/', link.text)
+            slug_match = _RE_SLUG.search(link.text)
             if slug_match:
                 activity['slug'] = slug_match.group(1)
 
         # Extract rating
-        member_rating = item.find('letterboxd:memberRating', namespaces)
+        member_rating = item.find(MEMBER_RATING_TAG)
         if member_rating is not None and member_rating.text:
             try:
                 rating_value = float(member_rating.text)
@@ -92,7 +110,7 @@ def parse_letterboxd_rss(xml_content: str) -> List[Dict]:
                 pass
 
         # Extract watched date
-        watched_date = item.find('letterboxd:watchedDate', namespaces)
+        watched_date = item.find(WATCHED_DATE_TAG)
         if watched_date is not None and watched_date.text:
             activity['datetime'] = watched_date.text
             try:
@@ -113,6 +131,14 @@ def parse_letterboxd_rss(xml_content: str) -> List[Dict]:
         if 'title' in activity:
             activities.append(activity)
 
+        # Detach the finished item so resident memory stays flat
+        item.clear()
+        if channel is not None:
+            try:
+                channel.remove(item)
+            except ValueError:
+                pass
+
     return activities
 
 
@@ -146,13 +172,13 @@ def format_for_trmnl(activities: List[Dict], limit: int = 5) -> Dict:
     merge_vars['total_activities'] = len(recent)
 
     # Get latest movie for prominent display
-    if recent:
-        latest = recent[0]
-        merge_vars['latest_title'] = latest.get('title', '')
-        merge_vars['latest_year'] = latest.get('year', '')
-        merge_vars['latest_rating'] = latest.get('rating_display', '')
-        merge_vars['latest_review'] = latest.get('review', '')
-        merge_vars['latest_date'] = latest.get('date', '')
+    if merge_vars['movies']:
+        latest = merge_vars['movies'][0]
+        merge_vars['latest_title'] = latest['title']
+        merge_vars['latest_year'] = latest['year']
+        merge_vars['latest_rating'] = latest['rating_display']
+        merge_vars['latest_review'] = latest['review']
+        merge_vars['latest_date'] = latest['date']
 
     return {'merge_variables': merge_vars}
 
@@ -174,16 +200,14 @@ def main():
 
     xml_file = xml_files[0]
 
+    # Parse activities straight from the file
     try:
-        with open(xml_file, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
+        with open(xml_file, 'rb') as f:
+            activities = parse_letterboxd_rss(f)
     except FileNotFoundError:
         print(f"Error: {xml_file} not found")
         return
 
-    # Parse activities
-    activities = parse_letterboxd_rss(xml_content)
-
     print(f"\n📽️  Found {len(activities)} movie activities\n")
     print("=" * 80)
 
@@ -208,7 +232,7 @@ def main():
     # Save to JSON file
     output_file = 'letterboxd_trmnl_data.json'
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(trmnl_data, f, indent=2, ensure_ascii=False)
+        f.write(json.dumps(trmnl_data, indent=2, ensure_ascii=False))
 
     print(f"\n✅ TRMNL data saved to: {output_file}")
     print(f"\n📊 Summary:")